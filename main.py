@@ -1,13 +1,23 @@
 # mini_gta_improved.py
 # Improved top-down GTA-like prototype with building collisions and nicer visuals.
-# Run: pip install pygame ; python mini_gta_improved.py
+# Run: pip install pygame numpy ; python mini_gta_improved.py
+# Optional: pip install numba (JIT-compiles the NPC update)
 
-import pygame, random, math, sys, os
+import pygame, random, math, sys, os, colorsys
 from pygame.math import Vector2
+import numpy as np
+try:
+    from numba import njit
+except ImportError:  # numba is optional; step_npcs then runs as plain Python
+    def njit(*args, **kwargs):
+        return lambda f: f
 
 pygame.init()
 SCREEN_W, SCREEN_H = 1280, 720
 screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
+# only queue the events the game loop handles; held keys are read via get_pressed()
+pygame.event.set_blocked(None)
+pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN])
 CLOCK = pygame.time.Clock()
 FONT = pygame.font.SysFont(None, 22)
 
@@ -19,6 +29,24 @@ CAR_SPRITE = pygame.image.load(ASSET("car.png")).convert_alpha()
 MARKER_SPRITE = pygame.image.load(ASSET("marker.png")).convert_alpha()
 GRASS_SPRITE = pygame.image.load(ASSET("grass.png")).convert_alpha()
 
+# Sprites pre-scaled to their in-game size
+PLAYER_SCALED = pygame.transform.scale(PLAYER_SPRITE, (24, 24)).convert_alpha()
+NPC_SCALED = pygame.transform.scale(NPC_SPRITE, (20, 20)).convert_alpha()
+
+# Building shadow source; buildings are at most 180x180, so one sub-rect covers any of them
+SHADOW_SRC = pygame.Surface((512, 512), pygame.SRCALPHA).convert_alpha()
+SHADOW_SRC.fill((0,0,0,40))
+
+# Pre-rotated car sprites (and matching shadows), one per whole degree
+CAR_W, CAR_H = 56, 32
+CAR_FRAMES = [pygame.transform.rotate(pygame.transform.scale(CAR_SPRITE, (CAR_W, CAR_H)), -a).convert_alpha()
+              for a in range(360)]
+CAR_SHADOWS = []
+for frame in CAR_FRAMES:
+    shadow = pygame.Surface(frame.get_size(), pygame.SRCALPHA).convert_alpha()
+    pygame.draw.ellipse(shadow, (0,0,0,60), shadow.get_rect())
+    CAR_SHADOWS.append(shadow)
+
 # Play background music
 pygame.mixer.music.load(ASSET("music.mp3"))
 pygame.mixer.music.play(-1)
@@ -26,6 +54,9 @@ pygame.mixer.music.play(-1)
 # World
 WORLD_W, WORLD_H = 6000, 4000
 
+# Collision grid cell size (world pixels)
+CELL = 256
+
 # Colors
 GRASS_COLOR = (76, 153, 80)
 ROAD_COLOR = (45, 45, 45)
@@ -37,160 +68,186 @@ MARKER_COLOR = (255, 100, 255)
 BUILDING_COLOR = (150, 140, 130)
 BUILDING_ROOF = (170, 160, 150)
 SHADOW = (0, 0, 0, 60)
+# 256-step hue wheel for the Konami rainbow flashing
+RAINBOW = [tuple(int(c*255) for c in colorsys.hsv_to_rgb(i/256, 1, 1)) for i in range(256)]
 
 def clamp(x, a, b): return max(a, min(b, x))
 
+# subtle vignette (darker near edges), drawn once and blitted over each frame
+VIGNETTE_SURF = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA).convert_alpha()
+for i in range(80):
+    alpha = int(3)  # keep low
+    pygame.draw.rect(VIGNETTE_SURF, (0,0,0,alpha), (i, i, SCREEN_W - i*2, SCREEN_H - i*2), 1)
+
 # Camera
 class Camera:
     def __init__(self, w, h):
-        self.pos = Vector2(0, 0)
+        self.x, self.y = 0.0, 0.0
         self.w, self.h = w, h
     def update(self, target_pos):
-        self.pos.x = clamp(target_pos.x - self.w/2, 0, WORLD_W - self.w)
-        self.pos.y = clamp(target_pos.y - self.h/2, 0, WORLD_H - self.h)
-    def world_to_screen(self, world_pos):
-        return world_pos - self.pos
+        self.x = clamp(target_pos.x - self.w/2, 0, WORLD_W - self.w)
+        self.y = clamp(target_pos.y - self.h/2, 0, WORLD_H - self.h)
+    def world_to_screen(self, x, y):
+        return (x - self.x, y - self.y)
 
 # Player
 class Player:
     def __init__(self, pos):
-        self.pos = Vector2(pos)
+        self.x, self.y = float(pos[0]), float(pos[1])
         self.speed = 300.0
         self.size = 24
         self.in_car = None
+        self._probe_rect = pygame.Rect(0,0,self.size,self.size)  # reused for move checks
+    @property
+    def pos(self):
+        return Vector2(self.x, self.y)
     def rect(self):
         r = pygame.Rect(0,0,self.size,self.size)
-        r.center = self.pos
+        r.center = (self.x, self.y)
         return r
-    def update(self, dt, keys, buildings):
+    def update(self, dt, input_state, grid):
         if self.in_car:
             return
-        dirv = Vector2(0,0)
-        if keys[pygame.K_w] or keys[pygame.K_UP]: dirv.y -= 1
-        if keys[pygame.K_s] or keys[pygame.K_DOWN]: dirv.y += 1
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]: dirv.x -= 1
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]: dirv.x += 1
-        if dirv.length_squared() > 0:
-            dirv = dirv.normalize()
-            newpos = self.pos + dirv * self.speed * dt
+        dx, dy, _, _ = input_state
+        if dx or dy:
+            step = self.speed * dt / math.hypot(dx, dy)
+            nx, ny = self.x + dx * step, self.y + dy * step
             # attempt move with collision resolution
-            next_rect = pygame.Rect(0,0,self.size,self.size)
-            next_rect.center = newpos
-            collided = False
-            for b in buildings:
-                if next_rect.colliderect(b.rect):
-                    collided = True
-                    break
-            if not collided:
-                self.pos = newpos
+            self._probe_rect.center = (nx, ny)
+            if not grid.collides(self._probe_rect):
+                self.x, self.y = nx, ny
         # clamp to world
-        self.pos.x = clamp(self.pos.x, 0, WORLD_W)
-        self.pos.y = clamp(self.pos.y, 0, WORLD_H)
+        self.x = clamp(self.x, 0, WORLD_W)
+        self.y = clamp(self.y, 0, WORLD_H)
     def draw(self, surf, cam):
         s = pygame.Rect(0,0,self.size,self.size)
-        s.center = cam.world_to_screen(self.pos)
-        sprite = pygame.transform.scale(PLAYER_SPRITE, (self.size, self.size))
-        surf.blit(sprite, s.topleft)
+        s.center = cam.world_to_screen(self.x, self.y)
+        surf.blit(PLAYER_SCALED, s.topleft)
         pygame.draw.circle(surf, (8,8,8), s.center, 4)
 
 # Car
 class Car:
     def __init__(self, pos):
-        self.pos = Vector2(pos)
-        self.vel = Vector2(0,0)
+        self.x, self.y = float(pos[0]), float(pos[1])
+        self.vx, self.vy = 0.0, 0.0
         self.angle = 0.0  # degrees
-        self.size = Vector2(56,32)
+        self._cos, self._sin = 1.0, 0.0  # cached trig of angle, refreshed when it changes
+        self.size = (CAR_W, CAR_H)
         self.max_speed = 900.0
         self.accel = 1400.0
         self.brake = 2600.0
         self.turn_speed = 160.0
         self.friction = 0.985
         self.driver = None
+        self._probe_rect = pygame.Rect((0,0), self.size)  # reused for move checks
+    @property
+    def pos(self):
+        return Vector2(self.x, self.y)
     def rect(self):
-        r = pygame.Rect(0,0,int(self.size.x),int(self.size.y))
-        r.center = self.pos
+        r = pygame.Rect((0,0), self.size)
+        r.center = (self.x, self.y)
         return r
-    def update(self, dt, keys, buildings):
+    def side_offset(self, dist):
+        # offset dist px to the car's right (negative dist: left); (cos, sin) of angle+90 is (-sin, cos)
+        return (-self._sin * dist, self._cos * dist)
+    def update(self, dt, input_state, grid):
         # driver input
         if self.driver:
-            forward = Vector2(math.cos(math.radians(self.angle)),
-                              math.sin(math.radians(self.angle)))
-            if keys[pygame.K_w] or keys[pygame.K_UP]:
-                self.vel += forward * self.accel * dt
-            if keys[pygame.K_s] or keys[pygame.K_DOWN]:
-                self.vel -= forward * self.brake * dt * 0.5
+            turn, _, accelerate, brake = input_state
+            fx, fy = self._cos, self._sin
+            if accelerate:
+                self.vx += fx * self.accel * dt
+                self.vy += fy * self.accel * dt
+            if brake:
+                self.vx -= fx * self.brake * dt * 0.5
+                self.vy -= fy * self.brake * dt * 0.5
             # stronger turning when moving
-            speed_factor = clamp(self.vel.length()/200.0, 0.15, 1.2)
-            if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-                self.angle -= self.turn_speed * dt * speed_factor
-            if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-                self.angle += self.turn_speed * dt * speed_factor
+            speed_factor = clamp(math.hypot(self.vx, self.vy)/200.0, 0.15, 1.2)
+            if turn:
+                self.angle += turn * self.turn_speed * dt * speed_factor
+                rad = math.radians(self.angle)
+                self._cos, self._sin = math.cos(rad), math.sin(rad)
         # physics
-        self.vel *= self.friction
-        if self.vel.length() > self.max_speed:
-            self.vel.scale_to_length(self.max_speed)
-        newpos = self.pos + self.vel * dt
+        self.vx *= self.friction
+        self.vy *= self.friction
+        speed = math.hypot(self.vx, self.vy)
+        if speed > self.max_speed:
+            self.vx *= self.max_speed / speed
+            self.vy *= self.max_speed / speed
+        nx, ny = self.x + self.vx * dt, self.y + self.vy * dt
         # simple collision: check against buildings; if collision, push back and damp velocity
-        car_rect = pygame.Rect(0,0,int(self.size.x),int(self.size.y))
-        car_rect.center = newpos
-        collided_any = False
-        for b in buildings:
-            if car_rect.colliderect(b.rect):
-                collided_any = True
-                # simple bounce: reverse and damp velocity
-                self.vel *= -0.35
-                # nudge position out along velocity negative direction
-                newpos = self.pos + self.vel * dt
-                break
-        self.pos = Vector2(clamp(newpos.x, 0, WORLD_W), clamp(newpos.y, 0, WORLD_H))
+        self._probe_rect.center = (nx, ny)
+        if grid.collides(self._probe_rect):
+            # simple bounce: reverse and damp velocity
+            self.vx *= -0.35
+            self.vy *= -0.35
+            # nudge position out along velocity negative direction
+            nx, ny = self.x + self.vx * dt, self.y + self.vy * dt
+        self.x = clamp(nx, 0, WORLD_W)
+        self.y = clamp(ny, 0, WORLD_H)
     def draw(self, surf, cam):
-        sprite = pygame.transform.rotate(
-            pygame.transform.scale(CAR_SPRITE, (int(self.size.x), int(self.size.y))),
-            -self.angle
-        )
-        r = sprite.get_rect(center=cam.world_to_screen(self.pos))
+        frame = int(self.angle) % 360
+        sprite = CAR_FRAMES[frame]
+        r = sprite.get_rect(center=cam.world_to_screen(self.x, self.y))
         # shadow
-        shadow = pygame.Surface((sprite.get_width(), sprite.get_height()), pygame.SRCALPHA)
-        pygame.draw.ellipse(shadow, (0,0,0,60), shadow.get_rect())
-        surf.blit(shadow, (r.left+6, r.top+8))
+        surf.blit(CAR_SHADOWS[frame], (r.left+6, r.top+8))
         surf.blit(sprite, r.topleft)
         if self.driver:
             pygame.draw.circle(surf, (8,8,8), (int(r.centerx), int(r.centery)), 4)
 
-# NPC simple wandering
-class NPC:
-    def __init__(self, pos):
-        self.pos = Vector2(pos)
-        self.speed = random.uniform(30, 110)
-        self.dir = Vector2(random.uniform(-1,1), random.uniform(-1,1))
-        if self.dir.length() == 0: self.dir = Vector2(1,0)
-        self.dir = self.dir.normalize()
-        self.timer = random.uniform(1.0, 4.0)
-        self.size = 20
-    def update(self, dt, buildings):
-        self.timer -= dt
-        if self.timer <= 0:
-            self.timer = random.uniform(1.0, 4.0)
-            self.dir = Vector2(random.uniform(-1,1), random.uniform(-1,1))
-            if self.dir.length() == 0: self.dir = Vector2(1,0)
-            self.dir = self.dir.normalize()
-        newpos = self.pos + self.dir * self.speed * dt
-        next_rect = pygame.Rect(0,0,self.size,self.size)
-        next_rect.center = newpos
+# Move every NPC along its direction unless the move would overlap a building.
+# rects holds one (left, top, right, bottom) row per building.
+@njit(cache=True)
+def step_npcs(px, py, dx, dy, sp, rects, half, dt):
+    for i in range(px.shape[0]):
+        nx = px[i] + dx[i] * sp[i] * dt
+        ny = py[i] + dy[i] * sp[i] * dt
         blocked = False
-        for b in buildings:
-            if next_rect.colliderect(b.rect):
+        for j in range(rects.shape[0]):
+            if (nx - half < rects[j, 2] and nx + half > rects[j, 0] and
+                    ny - half < rects[j, 3] and ny + half > rects[j, 1]):
                 blocked = True
                 break
         if not blocked:
-            self.pos = newpos
-        self.pos.x = clamp(self.pos.x, 0, WORLD_W)
-        self.pos.y = clamp(self.pos.y, 0, WORLD_H)
-    def draw(self, surf, cam):
-        r = pygame.Rect(0,0,self.size,self.size)
-        r.center = cam.world_to_screen(self.pos)
-        sprite = pygame.transform.scale(NPC_SPRITE, (self.size, self.size))
-        surf.blit(sprite, r.topleft)
+            px[i] = nx
+            py[i] = ny
+        px[i] = min(max(px[i], 0.0), WORLD_W)
+        py[i] = min(max(py[i], 0.0), WORLD_H)
+
+# NPCs simple wandering, stored as numpy arrays with one entry per NPC
+class NPCSystem:
+    def __init__(self, positions, building_rects):
+        n = len(positions)
+        self.rng = np.random.default_rng()
+        self.pos_x = np.array([p[0] for p in positions], dtype=float)
+        self.pos_y = np.array([p[1] for p in positions], dtype=float)
+        self.speed = self.rng.uniform(30, 110, n)
+        self.dir_x, self.dir_y = self.random_dirs(n)
+        self.timer = self.rng.uniform(1.0, 4.0, n)
+        self.size = 20
+        # building edges (left, top, right, bottom) for the overlap tests
+        edges = [(r.left, r.top, r.right, r.bottom) for r in building_rects]
+        self.building_edges = np.array(edges, dtype=float).reshape(-1, 4)
+        # first call compiles step_npcs (when numba is available) before the game loop starts
+        self.update(0.0)
+    def random_dirs(self, n):
+        # n random unit directions, drawn in one batch
+        angles = self.rng.uniform(0, 2*np.pi, n)
+        return np.cos(angles), np.sin(angles)
+    def update(self, dt):
+        self.timer -= dt
+        expired = self.timer <= 0
+        k = int(expired.sum())
+        if k:
+            self.dir_x[expired], self.dir_y[expired] = self.random_dirs(k)
+            self.timer[expired] = self.rng.uniform(1.0, 4.0, k)
+        step_npcs(self.pos_x, self.pos_y, self.dir_x, self.dir_y, self.speed,
+                  self.building_edges, self.size / 2, dt)
+    def draw(self, surf, cam, view_rect):
+        half = self.size // 2
+        surf.blits([(NPC_SCALED, cam.world_to_screen(x - half, y - half))
+                    for x, y in zip(self.pos_x.tolist(), self.pos_y.tolist())
+                    if view_rect.collidepoint(x, y)], doreturn=False)
 
 # Buildings with rects and simple roof highlight
 class Building:
@@ -199,60 +256,61 @@ class Building:
         self.roof_color = (clamp(BUILDING_ROOF[0] + random.randint(-10,10), 0,255),
                            clamp(BUILDING_ROOF[1] + random.randint(-10,10), 0,255),
                            clamp(BUILDING_ROOF[2] + random.randint(-10,10), 0,255))
-    def draw(self, surf, cam):
-        r = pygame.Rect(self.rect)
-        r.topleft = cam.world_to_screen(Vector2(self.rect.left, self.rect.top))
-        # base
-        pygame.draw.rect(surf, BUILDING_COLOR, (r.left, r.top, r.width, r.height))
-        # roof highlight
-        roof = pygame.Rect(r.left+6, r.top+6, r.width-12, 16)
-        pygame.draw.rect(surf, self.roof_color, roof)
-    @property
-    def rect(self):
-        return self._rect
-    @rect.setter
-    def rect(self, value):
-        self._rect = pygame.Rect(value)
-
-# Simple map drawing (grass + roads + noise)
-def draw_map(surf, cam, roads):
+        # pre-rendered look: base + roof highlight
+        self.surf = pygame.Surface(self.rect.size).convert()
+        self.surf.fill(BUILDING_COLOR)
+        pygame.draw.rect(self.surf, self.roof_color, (6, 6, self.rect.width-12, 16))
+
+# Uniform spatial hash over the (static) building rects
+class BuildingGrid:
+    def __init__(self, buildings):
+        self.cells = {}
+        for b in buildings:
+            for cy in range(b.rect.top // CELL, b.rect.bottom // CELL + 1):
+                for cx in range(b.rect.left // CELL, b.rect.right // CELL + 1):
+                    self.cells.setdefault((cx, cy), []).append(b.rect)
+    def collides(self, rect):
+        # only test buildings in the cells the rect overlaps
+        for cy in range(rect.top // CELL, rect.bottom // CELL + 1):
+            for cx in range(rect.left // CELL, rect.right // CELL + 1):
+                if rect.collidelist(self.cells.get((cx, cy), [])) != -1:
+                    return True
+        return False
+
+# Static world background (grass + roads + noise), rendered once at startup
+def build_background(roads):
+    bg = pygame.Surface((WORLD_W, WORLD_H)).convert()
     # fill grass with sprite tiles, fixed to world position
     for x in range(0, WORLD_W, GRASS_SPRITE.get_width()):
         for y in range(0, WORLD_H, GRASS_SPRITE.get_height()):
-            screen_pos = cam.world_to_screen(Vector2(x, y))
-            # Only draw if on screen (for performance)
-            if (0 - GRASS_SPRITE.get_width() < screen_pos.x < SCREEN_W and
-                0 - GRASS_SPRITE.get_height() < screen_pos.y < SCREEN_H):
-                surf.blit(GRASS_SPRITE, screen_pos)
+            bg.blit(GRASS_SPRITE, (x, y))
     # draw roads
     for r in roads:
-        r_s = pygame.Rect(r)
-        r_s.topleft = cam.world_to_screen(Vector2(r.left, r.top))
-        pygame.draw.rect(surf, ROAD_COLOR, (r_s.left, r_s.top, r.width, r.height))
+        pygame.draw.rect(bg, ROAD_COLOR, r)
         # road edge lines
-        pygame.draw.rect(surf, ROAD_EDGE, (r_s.left, r_s.top, r.width, 4))
-        pygame.draw.rect(surf, ROAD_EDGE, (r_s.left, r_s.top + r.height - 4, r.width, 4))
+        pygame.draw.rect(bg, ROAD_EDGE, (r.left, r.top, r.width, 4))
+        pygame.draw.rect(bg, ROAD_EDGE, (r.left, r.top + r.height - 4, r.width, 4))
         # --- Add dashed center lines ---
         line_color = (255, 255, 100)
         if r.width > r.height:  # horizontal road
-            y = r_s.top + r.height // 2
-            for x in range(r_s.left + 20, r_s.left + r.width - 20, 40):
-                pygame.draw.rect(surf, line_color, (x, y - 3, 24, 6))
+            y = r.top + r.height // 2
+            for x in range(r.left + 20, r.left + r.width - 20, 40):
+                pygame.draw.rect(bg, line_color, (x, y - 3, 24, 6))
         else:  # vertical road
-            x = r_s.left + r.width // 2
-            for y in range(r_s.top + 20, r_s.top + r.height - 20, 40):
-                pygame.draw.rect(surf, line_color, (x - 3, y, 6, 24))
+            x = r.left + r.width // 2
+            for y in range(r.top + 20, r.top + r.height - 20, 40):
+                pygame.draw.rect(bg, line_color, (x - 3, y, 6, 24))
         # add noise to road
-        add_noise(surf, area=(r_s.left, r_s.top, r.width, r.height), density=0.45, scale=1, cam=cam, world_fill='road')
-    # subtle vignette (darker near edges)
-    vignette = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
-    for i in range(80):
-        alpha = int(3)  # keep low
-        pygame.draw.rect(vignette, (0,0,0,alpha), (i, i, SCREEN_W - i*2, SCREEN_H - i*2), 1)
-    surf.blit(vignette, (0,0))
-
-def add_noise(surf, area, density, scale, cam, world_fill='grass'):
-    # area is in screen coordinates already
+        add_noise(bg, area=(r.left, r.top, r.width, r.height), density=0.45, scale=1, world_fill='road')
+    return bg
+
+# Simple map drawing (pre-rendered background)
+def draw_map(surf, cam, background):
+    # copy the visible part of the pre-rendered background
+    surf.blit(background, (0, 0), area=pygame.Rect(cam.x, cam.y, SCREEN_W, SCREEN_H))
+
+def add_noise(surf, area, density, scale, world_fill='grass'):
+    # area is in surf coordinates
     # fill with small speckles; scale controls spot size roughly
     left, top, w, h = area
     spots = int((w*h) * 0.0005 * density)
@@ -290,6 +348,8 @@ def main():
         w = random.randint(80,180)
         h = random.randint(80,180)
         buildings.append(Building((x,y,w,h)))
+    building_rects = [b.rect for b in buildings]
+    grid = BuildingGrid(buildings)
 
     # Find a player spawn point not inside any building
     def get_valid_spawn():
@@ -297,22 +357,23 @@ def main():
             pos = Vector2(random.randint(100, WORLD_W-1000), random.randint(100, WORLD_H-1000))
             r = pygame.Rect(0,0,24,24)
             r.center = pos
-            if not any(r.colliderect(b.rect) for b in buildings):
+            if r.collidelist(building_rects) == -1:
                 return pos
 
     player = Player(get_valid_spawn())
     car = Car((430,30))
 
     # Create NPCs (add this block)
-    npcs = []
+    npc_positions = []
     for _ in range(10):  # fewer NPCs for less crowding
         while True:
             pos = Vector2(random.randint(100, WORLD_W-100), random.randint(100, WORLD_H-100))
             r = pygame.Rect(0,0,20,20)
             r.center = pos
-            if not any(r.colliderect(b.rect) for b in buildings):
-                npcs.append(NPC(pos))
+            if r.collidelist(building_rects) == -1:
+                npc_positions.append(pos)
                 break
+    npcs = NPCSystem(npc_positions, building_rects)
 
     # generate roads (Rect in world coords)
     roads = [
@@ -322,6 +383,7 @@ def main():
         pygame.Rect(2000, 200, 300, WORLD_H),
     ]
     marker_pos = Vector2(2200, 1600)
+    background = build_background(roads)
 
     # input state
     running = True
@@ -335,6 +397,9 @@ def main():
     konami_active = False
     konami_timer = 0.0
 
+    # off-screen frame buffer, reused every frame
+    view = pygame.Surface((SCREEN_W, SCREEN_H)).convert()
+
     while running:
         dt = CLOCK.tick(60) / 1000.0
         e_pressed = False
@@ -359,6 +424,12 @@ def main():
                 # ----------------------------
 
         keys = pygame.key.get_pressed()
+        # movement input, polled once per frame: (dx, dy, accelerate, brake)
+        up = keys[pygame.K_w] | keys[pygame.K_UP]
+        down = keys[pygame.K_s] | keys[pygame.K_DOWN]
+        left = keys[pygame.K_a] | keys[pygame.K_LEFT]
+        right = keys[pygame.K_d] | keys[pygame.K_RIGHT]
+        input_state = (right - left, down - up, up, down)
 
         # Secret crash button: hold F10 to exit
         if keys[pygame.K_F10]:
@@ -372,90 +443,76 @@ def main():
                 player.in_car = car
                 car.driver = player
                 # snap player's position to car (keeps consistent)
-                player.pos = Vector2(car.pos)
+                player.x, player.y = car.x, car.y
             elif player.in_car == car:
                 # exit the car to its right side
-                off = Vector2(math.cos(math.radians(car.angle+90))*70,
-                              math.sin(math.radians(car.angle+90))*70)
-                exit_pos = car.pos + off
+                off_x, off_y = car.side_offset(70)
+                exit_x, exit_y = car.x + off_x, car.y + off_y
                 # ensure exit doesn't land inside building
                 exit_rect = pygame.Rect(0,0, player.size, player.size)
-                exit_rect.center = exit_pos
-                blocked = False
-                for b in buildings:
-                    if exit_rect.colliderect(b.rect):
-                        blocked = True
-                        break
-                if blocked:
+                exit_rect.center = (exit_x, exit_y)
+                if exit_rect.collidelist(building_rects) != -1:
                     # try left side
-                    off = Vector2(math.cos(math.radians(car.angle-90))*70,
-                                  math.sin(math.radians(car.angle-90))*70)
-                    exit_pos = car.pos + off
-                player.pos = Vector2(clamp(exit_pos.x, 0, WORLD_W), clamp(exit_pos.y, 0, WORLD_H))
+                    exit_x, exit_y = car.x - off_x, car.y - off_y
+                player.x = clamp(exit_x, 0, WORLD_W)
+                player.y = clamp(exit_y, 0, WORLD_H)
                 player.in_car = None
                 car.driver = None
                 # small backward impulse so car doesn't instantly run player over
-                car.vel *= 0.6
+                car.vx *= 0.6
+                car.vy *= 0.6
 
         # Konami effect: flashing rainbow and super speed
         if konami_active:
             konami_timer += dt
-            # Flashing rainbow color
-            import colorsys
-            hue = (konami_timer * 2) % 1.0
-            rgb = colorsys.hsv_to_rgb(hue, 1, 1)
-            PLAYER_COLOR = tuple(int(c*255) for c in rgb)
+            # Flashing rainbow color (two hue cycles per second)
+            PLAYER_COLOR = RAINBOW[int(konami_timer * 512) & 255]
             player.speed = 1200.0  # extremely fast
         else:
             PLAYER_COLOR = (50, 200, 255)
             player.speed = 300.0
 
         # Update
-        player.update(dt, keys, buildings)
-        car.update(dt, keys, buildings)
-        for n in npcs: n.update(dt, buildings)
+        player.update(dt, input_state, grid)
+        car.update(dt, input_state, grid)
+        npcs.update(dt)
 
         cam_target = car.pos if player.in_car else player.pos
         cam.update(cam_target)
+        # camera AABB (padded for shadows/sprites) used to cull off-screen drawing
+        view_rect = pygame.Rect(cam.x, cam.y, SCREEN_W, SCREEN_H).inflate(64, 64)
+        visible = [buildings[i] for i in view_rect.collidelistall(building_rects)]
 
         # Draw view
-        view = pygame.Surface((SCREEN_W, SCREEN_H))
-        draw_map(view, cam, roads)
+        draw_map(view, cam, background)
 
         # draw buildings (shadows + buildings)
-        for b in buildings:
-            # shadow
-            br = pygame.Rect(b.rect)
-            br.topleft = cam.world_to_screen(Vector2(b.rect.left, b.rect.top))
-            shadow_rect = pygame.Rect(br.left+8, br.top+10, br.width, br.height)
-            s = pygame.Surface((shadow_rect.width, shadow_rect.height), pygame.SRCALPHA)
-            s.fill((0,0,0,40))
-            view.blit(s, (shadow_rect.left, shadow_rect.top))
-        for b in buildings:
-            b.draw(view, cam)
+        view.blits([(SHADOW_SRC, cam.world_to_screen(b.rect.left+8, b.rect.top+10),
+                     (0, 0, b.rect.width, b.rect.height)) for b in visible], doreturn=False)
+        view.blits([(b.surf, cam.world_to_screen(b.rect.left, b.rect.top))
+                    for b in visible], doreturn=False)
 
         # draw marker
-        marker_rect = MARKER_SPRITE.get_rect(center=cam.world_to_screen(marker_pos))
+        marker_rect = MARKER_SPRITE.get_rect(center=cam.world_to_screen(marker_pos.x, marker_pos.y))
         view.blit(MARKER_SPRITE, marker_rect.topleft)
 
         # draw npcs and vehicles and player
-        for n in npcs: n.draw(view, cam)
+        npcs.draw(view, cam, view_rect)
         car.draw(view, cam)
         if not player.in_car:
             player.draw(view, cam)
         # If Konami active and in car, flash car too
         if konami_active and player.in_car == car:
-            car_color_hue = (konami_timer * 2.5) % 1.0
-            car_rgb = colorsys.hsv_to_rgb(car_color_hue, 1, 1)
-            CAR_COLOR = tuple(int(c*255) for c in car_rgb)
+            CAR_COLOR = RAINBOW[int(konami_timer * 640) & 255]
         else:
             CAR_COLOR = (200, 50, 50)
 
         # HUD
         screen.blit(view, (0,0))
+        screen.blit(VIGNETTE_SURF, (0,0))
         fps = int(CLOCK.get_fps())
         hud_lines = [
-            f'FPS: {fps}   World: {int(cam.pos.x)},{int(cam.pos.y)}   Press E to enter/exit car',
+            f'FPS: {fps}   World: {int(cam.x)},{int(cam.y)}   Press E to enter/exit car',
             f'Press R near marker to move it. F1 toggles debug.',
             f'Use WASD or arrows to move/drive.'
         ]
@@ -485,17 +542,17 @@ def main():
         # Debug overlay (optional)
         if show_debug:
             # draw building rects
-            for b in buildings:
+            for b in visible:
                 br = pygame.Rect(b.rect)
-                br.topleft = cam.world_to_screen(Vector2(b.rect.left, b.rect.top))
+                br.topleft = cam.world_to_screen(b.rect.left, b.rect.top)
                 pygame.draw.rect(screen, (255,0,0), br, 1)
             pr = player.rect()
             pr_screen = pr.copy()
-            pr_screen.center = cam.world_to_screen(pr.center)
+            pr_screen.center = cam.world_to_screen(*pr.center)
             pygame.draw.rect(screen, (0,0,255), pr_screen, 1)
             cr = car.rect()
             cr_screen = cr.copy()
-            cr_screen.center = cam.world_to_screen(cr.center)
+            cr_screen.center = cam.world_to_screen(*cr.center)
             pygame.draw.rect(screen, (255,255,0), cr_screen, 1)
 
         pygame.display.flip()